@@ -0,0 +1,124 @@
+"""Numba kernels for precursor detection.
+
+Optional accelerated paths for floml.precursors; importing this module
+raises ImportError when numba is not installed. The kernels are compiled
+(or loaded from numba's on-disk cache) when the module is first imported,
+so the first event analyzed doesn't pay for JIT compilation.
+"""
+
+import numpy as np
+from numba import njit
+
+_NS_PER_HOUR = 3_600_000_000_000
+
+
+@njit(cache=True)
+def _grow(arr: np.ndarray) -> np.ndarray:
+    """Return a copy of arr with twice the capacity."""
+    out = np.empty(arr.size * 2, dtype=arr.dtype)
+    out[:arr.size] = arr
+    return out
+
+
+@njit(cache=True)
+def _scan_rapid(stage: np.ndarray, window: int, thresh: float):
+    """Find runs where the windowed rise rate exceeds thresh.
+
+    Single pass over an hourly stage array computing the rate, the
+    threshold test, run boundaries and the per-run maximum without
+    intermediate arrays. Runs still open at the end are not reported.
+
+    Args:
+        stage: Hourly stage values (float64)
+        window: Rate window in samples (hours)
+        thresh: Rise rate threshold in ft/day
+
+    Returns:
+        Tuple of (start_idx, end_idx, max_rate) arrays, end exclusive
+    """
+    capacity = max(stage.size // 8, 4)
+    starts = np.empty(capacity, dtype=np.int64)
+    ends = np.empty(capacity, dtype=np.int64)
+    max_rates = np.empty(capacity, dtype=np.float64)
+
+    scale = 24.0 / window
+    n_events = 0
+    in_event = False
+    cur_start = 0
+    cur_max = 0.0
+
+    for i in range(window, stage.size):
+        rate = (stage[i] - stage[i - window]) * scale
+
+        if rate > thresh:
+            if not in_event:
+                in_event = True
+                cur_start = i
+                cur_max = rate
+            elif rate > cur_max:
+                cur_max = rate
+        elif in_event:
+            if n_events == starts.size:
+                starts = _grow(starts)
+                ends = _grow(ends)
+                max_rates = _grow(max_rates)
+            starts[n_events] = cur_start
+            ends[n_events] = i
+            max_rates[n_events] = cur_max
+            n_events += 1
+            in_event = False
+
+    return starts[:n_events], ends[:n_events], max_rates[:n_events]
+
+
+@njit(cache=True)
+def _hourly_interp(t_ns: np.ndarray, values: np.ndarray, origin_ns: int) -> np.ndarray:
+    """Hourly bin means with gaps filled by linear interpolation.
+    
+    Same result as resample('1H').mean().interpolate() for float64 data:
+    NaN readings are ignored, bins before the first valid one stay NaN
+    and bins after the last valid one repeat it.
+    
+    Args:
+        t_ns: Reading times as epoch nanoseconds
+        values: Stage values (float64)
+        origin_ns: Start of the first hourly bin, at or before min(t_ns)
+        
+    Returns:
+        Stage value per hour starting at origin_ns
+    """
+    n_bins = (t_ns.max() - origin_ns) // _NS_PER_HOUR + 1
+    sums = np.zeros(n_bins)
+    counts = np.zeros(n_bins, dtype=np.int64)
+    for i in range(t_ns.size):
+        v = values[i]
+        if not np.isnan(v):
+            b = (t_ns[i] - origin_ns) // _NS_PER_HOUR
+            sums[b] += v
+            counts[b] += 1
+    
+    out = np.full(n_bins, np.nan)
+    prev = -1
+    for b in range(n_bins):
+        if counts[b] == 0:
+            continue
+        out[b] = sums[b] / counts[b]
+        if prev >= 0 and b - prev > 1:
+            slope = (out[b] - out[prev]) / (b - prev)
+            for k in range(prev + 1, b):
+                out[k] = slope * (k - prev) + out[prev]
+        prev = b
+    
+    if prev >= 0:
+        out[prev + 1:] = out[prev]
+    return out
+
+
+def _warm_up():
+    """Compile the kernels for the argument types detect_rapid_rise uses."""
+    t = np.arange(12, dtype=np.int64) * _NS_PER_HOUR
+    stage = np.linspace(0.0, 1.0, 12)
+    _scan_rapid(_hourly_interp(t, stage, 0), 6, 0.5)
+
+
+_warm_up()
@@ -0,0 +1,184 @@
+"""Numba kernels for segmented regression.
+
+Brute-force breakpoint search for continuous 2- and 3-segment fits, used
+in place of pwlf's differential evolution; importing this module raises
+ImportError when numba is not installed.
+"""
+
+from typing import Optional
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def _sse_from_normal_equations(G: np.ndarray, r: np.ndarray, syy: float) -> float:
+    """Residual sum of squares of the least-squares fit G·β = r.
+
+    Gaussian elimination with partial pivoting on the small Gram matrix;
+    returns inf when it is singular (e.g. an empty segment).
+    """
+    k = r.size
+    A = G.copy()
+    b = r.copy()
+    for col in range(k):
+        pivot = col
+        for row in range(col + 1, k):
+            if abs(A[row, col]) > abs(A[pivot, col]):
+                pivot = row
+        if abs(A[pivot, col]) < 1e-10 * max(abs(A[col, col]), 1.0):
+            return np.inf
+        if pivot != col:
+            for c in range(k):
+                A[col, c], A[pivot, c] = A[pivot, c], A[col, c]
+            b[col], b[pivot] = b[pivot], b[col]
+        for row in range(col + 1, k):
+            f = A[row, col] / A[col, col]
+            for c in range(col, k):
+                A[row, c] -= f * A[col, c]
+            b[row] -= f * b[col]
+
+    beta = np.empty(k)
+    for row in range(k - 1, -1, -1):
+        acc = b[row]
+        for c in range(row + 1, k):
+            acc -= A[row, c] * beta[c]
+        beta[row] = acc / A[row, row]
+
+    return syy - np.dot(beta, r)
+
+
+@njit(cache=True, parallel=True)
+def _brute_fit_2seg(cand, n_suf, x_suf, xx_suf, y_suf, xy_suf, totals):
+    """SSE of the best continuous 2-segment fit for each candidate break.
+
+    The model is y = a + b·x + c·max(x - t, 0). Sums over the points above
+    each candidate t (the *_suf arrays) give its normal equations in O(1).
+
+    Returns:
+        Array of SSE values, one per candidate
+    """
+    n, sx, sxx, sy, sxy, syy = totals
+    sse = np.empty(cand.size)
+    for i in prange(cand.size):
+        t = cand[i]
+        h = x_suf[i] - t * n_suf[i]
+        xh = xx_suf[i] - t * x_suf[i]
+        hh = xx_suf[i] - 2.0 * t * x_suf[i] + t * t * n_suf[i]
+        yh = xy_suf[i] - t * y_suf[i]
+
+        G = np.array([
+            [n, sx, h],
+            [sx, sxx, xh],
+            [h, xh, hh],
+        ])
+        r = np.array([sy, sxy, yh])
+        sse[i] = _sse_from_normal_equations(G, r, syy)
+    return sse
+
+
+@njit(cache=True, parallel=True)
+def _brute_fit_3seg(cand, n_suf, x_suf, xx_suf, y_suf, xy_suf, totals):
+    """Best continuous 3-segment fit over all candidate pairs t1 < t2.
+
+    Returns:
+        Tuple of (sse, best_j) arrays indexed by the first breakpoint i
+    """
+    n, sx, sxx, sy, sxy, syy = totals
+    best_sse = np.full(cand.size, np.inf)
+    best_j = np.full(cand.size, -1, dtype=np.int64)
+    for i in prange(cand.size):
+        t1 = cand[i]
+        h1 = x_suf[i] - t1 * n_suf[i]
+        xh1 = xx_suf[i] - t1 * x_suf[i]
+        h1h1 = xx_suf[i] - 2.0 * t1 * x_suf[i] + t1 * t1 * n_suf[i]
+        yh1 = xy_suf[i] - t1 * y_suf[i]
+
+        for j in range(i + 1, cand.size):
+            t2 = cand[j]
+            h2 = x_suf[j] - t2 * n_suf[j]
+            xh2 = xx_suf[j] - t2 * x_suf[j]
+            h2h2 = xx_suf[j] - 2.0 * t2 * x_suf[j] + t2 * t2 * n_suf[j]
+            yh2 = xy_suf[j] - t2 * y_suf[j]
+            h1h2 = xx_suf[j] - (t1 + t2) * x_suf[j] + t1 * t2 * n_suf[j]
+
+            G = np.array([
+                [n, sx, h1, h2],
+                [sx, sxx, xh1, xh2],
+                [h1, xh1, h1h1, h1h2],
+                [h2, xh2, h1h2, h2h2],
+            ])
+            r = np.array([sy, sxy, yh1, yh2])
+            sse = _sse_from_normal_equations(G, r, syy)
+            if sse < best_sse[i]:
+                best_sse[i] = sse
+                best_j[i] = j
+    return best_sse, best_j
+
+
+def _brute_breakpoints(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_segments: int,
+    max_candidates: int = 200
+) -> Optional[np.ndarray]:
+    """Interior breakpoints of the best continuous fit on a candidate grid.
+
+    Candidates are the unique interior x values, thinned to at most
+    max_candidates evenly spaced by rank.
+
+    Args:
+        x: Independent variable, NaN-free
+        y: Dependent variable, NaN-free
+        n_segments: 2 or 3
+        max_candidates: Cap on candidate breakpoints
+
+    Returns:
+        Sorted array of n_segments - 1 breakpoints, or None if x has too
+        few distinct values
+    """
+    # Standardize so the normal equations stay well conditioned
+    x_mean, x_std = x.mean(), x.std()
+    if x_std == 0:
+        return None
+    xs = (x - x_mean) / x_std
+    ys = y - y.mean()
+
+    order = np.argsort(xs, kind='stable')
+    xs, ys = xs[order], ys[order]
+
+    cand = np.unique(xs)[1:-1]
+    if cand.size < n_segments - 1:
+        return None
+    if cand.size > max_candidates:
+        cand = cand[np.linspace(0, cand.size - 1, max_candidates).astype(np.int64)]
+
+    # Sums over the points strictly above each candidate
+    def suffix(values):
+        csum = np.concatenate(([0.0], np.cumsum(values[::-1])))[::-1]
+        return csum[np.searchsorted(xs, cand, side='right')]
+
+    n_suf = suffix(np.ones_like(xs))
+    x_suf = suffix(xs)
+    xx_suf = suffix(xs * xs)
+    y_suf = suffix(ys)
+    xy_suf = suffix(xs * ys)
+    totals = (
+        float(xs.size), xs.sum(), (xs * xs).sum(),
+        ys.sum(), (xs * ys).sum(), (ys * ys).sum()
+    )
+
+    if n_segments == 2:
+        sse = _brute_fit_2seg(cand, n_suf, x_suf, xx_suf, y_suf, xy_suf, totals)
+        i = np.argmin(sse)
+        if not np.isfinite(sse[i]):
+            return None
+        best = cand[[i]]
+    else:
+        sse, best_j = _brute_fit_3seg(cand, n_suf, x_suf, xx_suf, y_suf, xy_suf, totals)
+        i = np.argmin(sse)
+        if not np.isfinite(sse[i]):
+            return None
+        best = cand[[i, best_j[i]]]
+
+    return best * x_std + x_mean
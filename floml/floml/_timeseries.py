@@ -0,0 +1,68 @@
+"""Time series helpers shared by the analysis modules."""
+
+import numpy as np
+import pandas as pd
+
+_NS_PER_HOUR = 3_600_000_000_000
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+
+def as_float32(series: pd.Series) -> pd.Series:
+    """Gauge values as float32.
+
+    Stage readings carry far less precision than float32 holds, and the
+    smaller dtype halves memory traffic through FFTs and window scans.
+    """
+    return series.astype(np.float32, copy=False)
+
+
+def resample_hourly(series: pd.Series) -> pd.Series:
+    """Equivalent of series.resample('1H').mean()."""
+    return _resample_mean(series, '1H', _NS_PER_HOUR)
+
+
+def resample_daily(series: pd.Series) -> pd.Series:
+    """Equivalent of series.resample('1D').mean()."""
+    return _resample_mean(series, '1D', _NS_PER_DAY)
+
+
+def floor_timestamp(ts: pd.Timestamp, freq: str) -> pd.Timestamp:
+    """Start of the fixed-frequency bin holding ts, on the local clock.
+    
+    Unlike ts.floor(freq) the result is never re-localized, so readings in
+    a repeated fall-back hour don't raise AmbiguousTimeError.
+    """
+    wall = ts.tz_localize(None)
+    return ts - (wall - wall.floor(freq))
+
+
+def _resample_mean(series: pd.Series, freq: str, step_ns: int) -> pd.Series:
+    """Bin means computed with np.bincount.
+
+    Work scales with the number of observations rather than the number of
+    bins spanned. Empty bins and bins holding only NaN come back as NaN,
+    as with pandas.
+    """
+    index = series.index
+
+    # Local days across DST aren't a fixed number of nanoseconds
+    if len(series) == 0 or (step_ns > _NS_PER_HOUR and index.tz is not None and str(index.tz) != 'UTC'):
+        return series.resample(freq).mean()
+
+    first_bin = floor_timestamp(index.min(), freq)
+    t = index.as_unit('ns').asi8
+    bins = (t - first_bin.as_unit('ns').value) // step_ns
+    n_bins = int(bins.max()) + 1
+
+    # Sums accumulate in float64; float32 input stays float32 on output
+    out_dtype = np.float32 if series.dtype == np.float32 else np.float64
+    values = series.to_numpy(dtype=np.float64)
+    good = ~np.isnan(values)
+    counts = np.bincount(bins[good], minlength=n_bins)
+    sums = np.bincount(bins[good], weights=values[good], minlength=n_bins)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (sums / counts).astype(out_dtype, copy=False)
+
+    bin_index = pd.date_range(start=first_bin, periods=n_bins, freq=freq, name=index.name)
+    return pd.Series(means, index=bin_index, name=series.name)
@@ -4,20 +4,28 @@ Analyzes relationships between upstream and downstream gauges,
 including timing lags, magnitude correlations, and flood wave propagation.
 """
 
+import math
 import numpy as np
 import pandas as pd
 from typing import Tuple, Optional, Dict
 from dataclasses import dataclass
-from scipy import stats
-from scipy.signal import correlate
+from scipy.fft import rfft, irfft, next_fast_len
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from floml._timeseries import as_float32, resample_hourly
 
 logger = logging.getLogger(__name__)
 
 
 @dataclass
 class CorrelationResult:
-    """Results from correlation analysis between two stations."""
+    """Results from correlation analysis between two stations.
+    
+    For sample sizes of 30 or more, p_value uses the normal approximation
+    to Fisher's z-transform of r (within a few thousandths of the exact
+    value); smaller samples use the exact t-test.
+    """
     pearson_r: float
     p_value: float
     lag_hours: int
@@ -36,6 +44,18 @@ class CorrelationResult:
         )
 
 
+def _aligned_values(a: pd.Series, b: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Values of two series on their shared timestamps, NaN rows dropped.
+    
+    Float32 input stays float32; anything else comes back as float64.
+    """
+    a, b = a.align(b, join='inner')
+    dtype = np.float32 if a.dtype == b.dtype == np.float32 else np.float64
+    arr = np.column_stack([a.to_numpy(dtype=dtype), b.to_numpy(dtype=dtype)])
+    good = ~np.isnan(arr).any(axis=1)
+    return arr[good, 0], arr[good, 1]
+
+
 def find_optimal_lag(
     upstream: pd.Series,
     downstream: pd.Series,
@@ -54,35 +74,116 @@ def find_optimal_lag(
         Optimal lag in hours (positive = downstream lags behind upstream)
     """
     # Resample to hourly if not already
-    upstream_hourly = upstream.resample('1H').mean()
-    downstream_hourly = downstream.resample('1H').mean()
+    upstream_hourly = resample_hourly(as_float32(upstream))
+    downstream_hourly = resample_hourly(as_float32(downstream))
     
     # Align and drop NaN
-    df = pd.DataFrame({
-        'upstream': upstream_hourly,
-        'downstream': downstream_hourly
-    }).dropna()
-    
-    if len(df) < max_lag_hours:
-        logger.warning(f"Only {len(df)} overlapping points, lag detection may be unreliable")
-    
-    # Compute cross-correlation
-    correlation = correlate(
-        df['downstream'].values - df['downstream'].mean(),
-        df['upstream'].values - df['upstream'].mean(),
-        mode='same'
-    )
+    u, v = _aligned_values(upstream_hourly, downstream_hourly)
+    
+    if len(u) < max_lag_hours:
+        logger.warning(f"Only {len(u)} overlapping points, lag detection may be unreliable")
     
-    # Find lag with maximum correlation
-    center = len(correlation) // 2
-    search_range = min(max_lag_hours, center)
+    u = u - u.mean()
+    v = v - v.mean()
+    max_lag = min(max_lag_hours, len(u) - 1)
     
-    lag_index = np.argmax(correlation[center-search_range:center+search_range]) - search_range
+    # Direct dot products win while the lag window is small next to the
+    # FFT's log factor (same trade-off as scipy's method='auto')
+    n_lags = 2 * max_lag + 1
+    if n_lags <= 8 * np.log2(max(len(u), 2)):
+        window = _xcorr_direct(u, v, max_lag)
+    else:
+        window = _xcorr_fft(u, v, max_lag)
+    
+    lag_index = int(np.argmax(window)) - max_lag
     
     logger.info(f"Optimal lag: {lag_index} hours")
     return lag_index
 
 
+def _pearson_linregress(x: np.ndarray, y: np.ndarray) -> Tuple[float, float, float, float]:
+    """Pearson r, two-sided p-value, slope and intercept of y on x.
+    
+    Equivalent to scipy.stats.pearsonr + linregress (p-value per
+    _pearson_p_value), but all are derived from a single set of sums
+    instead of re-scanning the data per statistic. Sums are taken about
+    the first sample so large stage offsets don't cancel out the variance,
+    and always accumulate in float64.
+    """
+    n = x.size
+    dx = x - x[0]
+    dy = y - y[0]
+    
+    sx = dx.sum(dtype=np.float64)
+    sy = dy.sum(dtype=np.float64)
+    sxx = np.einsum('i,i->', dx, dx, dtype=np.float64)
+    syy = np.einsum('i,i->', dy, dy, dtype=np.float64)
+    sxy = np.einsum('i,i->', dx, dy, dtype=np.float64)
+    
+    mean_x = sx / n
+    mean_y = sy / n
+    var_x = sxx / n - mean_x * mean_x
+    var_y = syy / n - mean_y * mean_y
+    cov = sxy / n - mean_x * mean_y
+    
+    slope = cov / var_x
+    intercept = (mean_y + float(y[0])) - slope * (mean_x + float(x[0]))
+    r = float(np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0))
+    
+    return r, _pearson_p_value(r, n), float(slope), float(intercept)
+
+
+def _pearson_p_value(r: float, n: int) -> float:
+    """Two-sided p-value for Pearson r over n samples.
+    
+    n >= 30 uses the normal approximation to Fisher's z-transform (two
+    scalar math calls); smaller samples use the exact t-test via scipy.
+    """
+    if abs(r) >= 1.0:
+        return 0.0
+    
+    if n >= 30:
+        z = math.atanh(r)
+        se = 1.0 / math.sqrt(n - 3)
+        return math.erfc(abs(z) / se / math.sqrt(2))
+    
+    from scipy import stats
+    
+    # t-test on r with n - 2 degrees of freedom
+    t = r * math.sqrt((n - 2) / (1.0 - r * r))
+    return float(2 * stats.t.sf(abs(t), n - 2))
+
+
+def _xcorr_direct(u: np.ndarray, v: np.ndarray, max_lag: int) -> np.ndarray:
+    """Cross-correlation of v against u for lags -max_lag..+max_lag.
+    
+    One dot product per lag, O(N·L); positive lags mean v trails u.
+    """
+    n = len(u)
+    out = np.empty(2 * max_lag + 1)
+    for k in range(-max_lag, max_lag + 1):
+        if k >= 0:
+            out[k + max_lag] = u[:n - k] @ v[k:]
+        else:
+            out[k + max_lag] = u[-k:] @ v[:n + k]
+    return out
+
+
+def _xcorr_fft(u: np.ndarray, v: np.ndarray, max_lag: int) -> np.ndarray:
+    """FFT equivalent of _xcorr_direct, O(N log N).
+    
+    Real FFTs padded just enough that the kept lags don't wrap around,
+    rounded up to a 5-smooth length so pocketfft avoids slow prime sizes.
+    """
+    n_fft = next_fast_len(len(u) + max_lag, real=True)
+    correlation = irfft(
+        rfft(v, n_fft, workers=-1) * np.conj(rfft(u, n_fft, workers=-1)),
+        n_fft,
+        workers=-1
+    )
+    return np.concatenate([correlation[n_fft - max_lag:], correlation[:max_lag + 1]])
+
+
 def correlate_stations(
     upstream: pd.Series,
     downstream: pd.Series,
@@ -106,25 +207,20 @@ def correlate_stations(
         lag_hours = 0
     
     # Shift downstream by lag
-    downstream_shifted = downstream.shift(freq=f'{-lag_hours}H')
+    downstream_shifted = as_float32(downstream).shift(freq=f'{-lag_hours}H')
     
     # Align data
-    df = pd.DataFrame({
-        'upstream': upstream,
-        'downstream': downstream_shifted
-    }).dropna()
+    u, d = _aligned_values(as_float32(upstream), downstream_shifted)
+    sample_size = len(u)
     
-    if len(df) < 10:
-        raise ValueError(f"Insufficient overlapping data points: {len(df)}")
+    if sample_size < 10:
+        raise ValueError(f"Insufficient overlapping data points: {sample_size}")
     
-    # Compute Pearson correlation
-    pearson_r, p_value = stats.pearsonr(df['upstream'], df['downstream'])
+    # Pearson correlation and linear regression from one set of moments
+    pearson_r, p_value, slope, intercept = _pearson_linregress(u, d)
+    r_squared = pearson_r ** 2
     
-    # Linear regression
-    slope, intercept, r_value, _, _ = stats.linregress(df['upstream'], df['downstream'])
-    r_squared = r_value ** 2
-    
-    logger.info(f"Correlation: r = {pearson_r:.3f}, lag = {lag_hours}h, n = {len(df)}")
+    logger.info(f"Correlation: r = {pearson_r:.3f}, lag = {lag_hours}h, n = {sample_size}")
     
     return CorrelationResult(
         pearson_r=pearson_r,
@@ -133,7 +229,7 @@ def correlate_stations(
         r_squared=r_squared,
         slope=slope,
         intercept=intercept,
-        sample_size=len(df)
+        sample_size=sample_size
     )
 
 
@@ -154,6 +250,24 @@ def predict_downstream(
     return predicted, correlation.lag_hours
 
 
+def _correlate_pair(
+    data: Dict[str, pd.Series],
+    upstream_code: str,
+    downstream_code: str
+) -> Optional[CorrelationResult]:
+    """Correlate one station pair, or None on failure."""
+    logger.info(f"Analyzing {upstream_code} → {downstream_code}")
+    
+    try:
+        return correlate_stations(
+            data[upstream_code],
+            data[downstream_code]
+        )
+    except Exception as e:
+        logger.error(f"Error analyzing {upstream_code} → {downstream_code}: {e}")
+        return None
+
+
 def analyze_station_network(
     data: Dict[str, pd.Series],
     station_order: list
@@ -167,34 +281,41 @@ def analyze_station_network(
     Returns:
         DataFrame with pairwise correlation statistics
     """
-    results = []
+    pairs = list(zip(station_order[:-1], station_order[1:]))
+    n_pairs = len(pairs)
     
-    for i in range(len(station_order) - 1):
-        upstream_code = station_order[i]
-        downstream_code = station_order[i + 1]
-        
-        logger.info(f"Analyzing {upstream_code} → {downstream_code}")
-        
-        try:
-            corr = correlate_stations(
-                data[upstream_code],
-                data[downstream_code]
-            )
-            
-            results.append({
-                'upstream': upstream_code,
-                'downstream': downstream_code,
-                'correlation': corr.pearson_r,
-                'p_value': corr.p_value,
-                'lag_hours': corr.lag_hours,
-                'r_squared': corr.r_squared,
-                'slope': corr.slope,
-                'sample_size': corr.sample_size
-            })
-        except Exception as e:
-            logger.error(f"Error analyzing {upstream_code} → {downstream_code}: {e}")
-    
-    return pd.DataFrame(results)
+    # Pairs are independent and the heavy lifting (FFT, BLAS dot products)
+    # releases the GIL, so threads scale without copying the data
+    with ThreadPoolExecutor() as executor:
+        results = list(executor.map(lambda pair: _correlate_pair(data, *pair), pairs))
+    
+    # Typed columns filled by position; pairs that failed are dropped
+    cols = {
+        'upstream': np.empty(n_pairs, dtype=object),
+        'downstream': np.empty(n_pairs, dtype=object),
+        'correlation': np.full(n_pairs, np.nan),
+        'p_value': np.full(n_pairs, np.nan),
+        'lag_hours': np.zeros(n_pairs, dtype=np.int64),
+        'r_squared': np.full(n_pairs, np.nan),
+        'slope': np.full(n_pairs, np.nan),
+        'sample_size': np.zeros(n_pairs, dtype=np.int64)
+    }
+    ok = np.zeros(n_pairs, dtype=bool)
+    
+    for i, ((upstream_code, downstream_code), corr) in enumerate(zip(pairs, results)):
+        if corr is None:
+            continue
+        ok[i] = True
+        cols['upstream'][i] = upstream_code
+        cols['downstream'][i] = downstream_code
+        cols['correlation'][i] = corr.pearson_r
+        cols['p_value'][i] = corr.p_value
+        cols['lag_hours'][i] = corr.lag_hours
+        cols['r_squared'][i] = corr.r_squared
+        cols['slope'][i] = corr.slope
+        cols['sample_size'][i] = corr.sample_size
+    
+    return pd.DataFrame({name: values[ok] for name, values in cols.items()})
 
 
 if __name__ == "__main__":
@@ -3,18 +3,23 @@
 Provides connections to the PostgreSQL database curated by the Rust daemon.
 """
 
+import io
 import os
 import logging
-from typing import Optional
+from typing import Optional, Dict, List, Tuple
+import pandas as pd
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
-import psycopg2
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# .env is read on first use rather than at import
+_dotenv_loaded = False
+
+# Shared engine and the (url, echo) it was created for
+_engine: Optional[Engine] = None
+_engine_key: Optional[Tuple[str, bool]] = None
 
 
 def get_database_url() -> str:
@@ -26,6 +31,11 @@ def get_database_url() -> str:
     Raises:
         ValueError: If DATABASE_URL not set
     """
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+    
     url = os.getenv("DATABASE_URL")
     if not url:
         raise ValueError(
@@ -36,7 +46,10 @@ def get_database_url() -> str:
 
 
 def get_engine(echo: bool = False) -> Engine:
-    """Create SQLAlchemy engine for database connections.
+    """Get the shared SQLAlchemy engine for database connections.
+    
+    The engine is created once per (url, echo) and reused, so callers
+    share its connection pool.
     
     Args:
         echo: If True, log all SQL statements
@@ -44,22 +57,83 @@ def get_engine(echo: bool = False) -> Engine:
     Returns:
         SQLAlchemy engine
     """
-    url = get_database_url()
-    engine = create_engine(url, echo=echo)
-    logger.info("Created database engine")
-    return engine
+    global _engine, _engine_key
+    
+    key = (get_database_url(), echo)
+    if _engine is None or _engine_key != key:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = create_engine(
+            key[0],
+            echo=echo,
+            pool_size=8,
+            max_overflow=16,
+            pool_pre_ping=True,
+            pool_recycle=3600
+        )
+        _engine_key = key
+        logger.info("Created database engine")
+    
+    return _engine
+
+
+def reset_engine() -> None:
+    """Dispose of the shared engine so the next get_engine() builds a new one.
+    
+    Mainly for tests, or after DATABASE_URL changes.
+    """
+    global _engine, _engine_key
+    
+    if _engine is not None:
+        _engine.dispose()
+    _engine = None
+    _engine_key = None
 
 
 def get_connection():
-    """Get raw psycopg2 connection.
+    """Get raw psycopg2 connection from the engine's pool.
+    
+    Call close() to return the connection to the pool.
     
     Returns:
-        psycopg2 connection object
+        psycopg2 connection object (pool proxy)
     """
-    url = get_database_url()
-    conn = psycopg2.connect(url)
-    logger.info("Created database connection")
-    return conn
+    return get_engine().raw_connection()
+
+
+def read_observations_copy(
+    sql: str,
+    params: Optional[dict] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+    parse_dates: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Run a SELECT through COPY ... TO STDOUT and load it as a DataFrame.
+    
+    For large observation pulls this replaces pd.read_sql: rows arrive as
+    one CSV stream parsed by pandas' C reader, skipping per-row Python
+    object conversion in the driver.
+    
+    Args:
+        sql: SELECT statement (no trailing semicolon)
+        params: psycopg2-style parameters, bound client-side with mogrify
+            since COPY does not accept bind parameters
+        dtypes: Column dtypes passed to pd.read_csv
+        parse_dates: Columns to parse as timestamps
+        
+    Returns:
+        DataFrame with one column per selected column
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            query = cur.mogrify(sql, params).decode() if params else sql
+            buf = io.BytesIO()
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT CSV, HEADER)", buf)
+    finally:
+        conn.close()
+    
+    buf.seek(0)
+    return pd.read_csv(buf, dtype=dtypes, parse_dates=parse_dates)
 
 
 def verify_schemas(engine: Optional[Engine] = None) -> bool:
@@ -81,13 +155,11 @@ def verify_schemas(engine: Optional[Engine] = None) -> bool:
     
     with engine.connect() as conn:
         result = conn.execute(text(
-            "SELECT schema_name FROM information_schema.schemata "
-            "WHERE schema_name = ANY(:schemas)"
+            "SELECT s FROM unnest(CAST(:schemas AS text[])) AS s "
+            "WHERE s NOT IN (SELECT schema_name FROM information_schema.schemata)"
         ), {"schemas": required_schemas})
         
-        existing = {row[0] for row in result}
-    
-    missing = set(required_schemas) - existing
+        missing = [row[0] for row in result]
     
     if missing:
         raise RuntimeError(
@@ -5,11 +5,14 @@ Identifies early warning signals in gauge data before flood events.
 
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
 from datetime import timedelta
 import logging
 
+from floml._timeseries import as_float32, floor_timestamp, resample_hourly, resample_daily
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +35,103 @@ class PrecursorEvent:
         )
 
 
+@dataclass
+class PrecursorEventArray:
+    """Detected precursor conditions stored column-wise.
+    
+    Each field holds one value per event. Indexing with an integer or
+    iterating yields PrecursorEvent copies, so list-style callers keep
+    working; slices, masks and index arrays yield a new PrecursorEventArray.
+    """
+    precursor_type: np.ndarray  # object
+    detected_at: pd.DatetimeIndex
+    value: np.ndarray  # float64
+    severity: np.ndarray  # object
+    hours_before_peak: np.ndarray  # float64
+    description: np.ndarray  # object
+    
+    @classmethod
+    def from_columns(
+        cls,
+        precursor_type: str,
+        detected_at: pd.DatetimeIndex,
+        value: np.ndarray,
+        severity: np.ndarray,
+        description: List[str]
+    ) -> "PrecursorEventArray":
+        """Build from per-event columns sharing one precursor type."""
+        n = len(detected_at)
+        return cls(
+            precursor_type=np.full(n, precursor_type, dtype=object),
+            detected_at=pd.DatetimeIndex(detected_at),
+            value=np.asarray(value, dtype=np.float64),
+            severity=np.asarray(severity, dtype=object),
+            hours_before_peak=np.zeros(n),
+            description=np.asarray(description, dtype=object)
+        )
+    
+    @classmethod
+    def from_events(cls, events: List[PrecursorEvent]) -> "PrecursorEventArray":
+        """Convert a list of PrecursorEvent objects."""
+        return cls(
+            precursor_type=np.array([e.precursor_type for e in events], dtype=object),
+            detected_at=pd.DatetimeIndex([e.detected_at for e in events]),
+            value=np.fromiter((e.value for e in events), dtype=np.float64, count=len(events)),
+            severity=np.array([e.severity for e in events], dtype=object),
+            hours_before_peak=np.fromiter(
+                (e.hours_before_peak for e in events), dtype=np.float64, count=len(events)
+            ),
+            description=np.array([e.description for e in events], dtype=object)
+        )
+    
+    @classmethod
+    def concat(cls, arrays: List["PrecursorEventArray"]) -> "PrecursorEventArray":
+        """Join several arrays end to end."""
+        non_empty = [a for a in arrays if len(a)] or arrays[:1]
+        detected_at = non_empty[0].detected_at
+        for a in non_empty[1:]:
+            detected_at = detected_at.append(a.detected_at)
+        
+        return cls(
+            precursor_type=np.concatenate([a.precursor_type for a in non_empty]),
+            detected_at=detected_at,
+            value=np.concatenate([a.value for a in non_empty]),
+            severity=np.concatenate([a.severity for a in non_empty]),
+            hours_before_peak=np.concatenate([a.hours_before_peak for a in non_empty]),
+            description=np.concatenate([a.description for a in non_empty])
+        )
+    
+    def take(self, indexer) -> "PrecursorEventArray":
+        """Select events by slice, boolean mask or integer positions."""
+        return PrecursorEventArray(
+            precursor_type=self.precursor_type[indexer],
+            detected_at=self.detected_at[indexer],
+            value=self.value[indexer],
+            severity=self.severity[indexer],
+            hours_before_peak=self.hours_before_peak[indexer],
+            description=self.description[indexer]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.value)
+    
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return PrecursorEvent(
+                precursor_type=self.precursor_type[key],
+                detected_at=self.detected_at[key],
+                value=float(self.value[key]),
+                severity=self.severity[key],
+                hours_before_peak=float(self.hours_before_peak[key]),
+                description=self.description[key]
+            )
+        return self.take(key)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
 def calculate_rise_rate(
     stage: pd.Series,
     window_hours: int = 6
@@ -46,70 +146,125 @@ def calculate_rise_rate(
         Series of rise rates (ft/day)
     """
     # Ensure hourly frequency
-    stage_hourly = stage.resample('1H').mean().interpolate()
+    stage_hourly = resample_hourly(as_float32(stage)).interpolate()
+    
+    return _hourly_rise_rate(stage_hourly, window_hours)
+
+
+def _hourly_rise_rate(stage_hourly: pd.Series, window_hours: int) -> pd.Series:
+    """Rise rate in ft/day for a series already on an hourly grid.
+    
+    Float32 input gives a float32 result.
+    """
+    dtype = np.float32 if stage_hourly.dtype == np.float32 else np.float64
+    vals = stage_hourly.to_numpy(dtype=dtype)
     
     # Calculate change over window
-    rise = stage_hourly.diff(periods=window_hours)
+    rise = np.empty_like(vals)
+    rise[:window_hours] = np.nan
+    rise[window_hours:] = vals[window_hours:] - vals[:-window_hours]
     
     # Convert to ft/day
-    rise_rate_per_day = rise * (24.0 / window_hours)
+    rise *= 24.0 / window_hours
+    
+    return pd.Series(rise, index=stage_hourly.index, name=stage_hourly.name, copy=False)
+
+
+def _find_rapid_runs(
+    stage_hourly: pd.Series,
+    window_hours: int,
+    threshold_ft_per_day: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """NumPy equivalent of _precursors_numba._scan_rapid.
+    
+    Returns:
+        Tuple of (start_idx, end_idx, max_rate) arrays, end exclusive
+    """
+    rates = _hourly_rise_rate(stage_hourly, window_hours).to_numpy()
+    
+    # Find periods exceeding threshold
+    rapid = rates > threshold_ft_per_day
+    
+    # Group consecutive periods: +1/-1 transitions mark event starts/ends
+    mask = rapid.astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.r_[0, mask, 0]))
+    starts, ends = edges[0::2], edges[1::2]
+    
+    # Only events that have ended within the series are reported
+    closed = ends < len(mask)
+    starts, ends = starts[closed], ends[closed]
+    
+    # Positional slices of the raw array, no label lookups per event
+    max_rates = np.array([rates[start:end].max() for start, end in zip(starts, ends)], dtype=np.float64)
     
-    return rise_rate_per_day
+    return starts, ends, max_rates
 
 
 def detect_rapid_rise(
     stage: pd.Series,
     threshold_ft_per_day: float = 0.5,
     min_duration_hours: int = 3
-) -> List[PrecursorEvent]:
+) -> PrecursorEventArray:
     """Detect rapid river rise events.
     
+    Uses the numba kernel when numba is installed, otherwise NumPy.
+    
     Args:
         stage: Time series of stage values
         threshold_ft_per_day: Minimum rise rate to flag
         min_duration_hours: Minimum sustained duration
         
     Returns:
-        List of detected rapid rise events
+        Detected rapid rise events
     """
-    rise_rate = calculate_rise_rate(stage, window_hours=6)
-    
-    # Find periods exceeding threshold
-    rapid = rise_rate > threshold_ft_per_day
-    
-    # Group consecutive periods
-    events = []
-    in_event = False
-    event_start = None
-    
-    for timestamp, is_rapid in rapid.items():
-        if is_rapid and not in_event:
-            # Event starts
-            event_start = timestamp
-            in_event = True
-        elif not is_rapid and in_event:
-            # Event ends
-            duration = (timestamp - event_start).total_seconds() / 3600
-            if duration >= min_duration_hours:
-                max_rate = rise_rate[event_start:timestamp].max()
-                
-                # Classify severity
-                if max_rate > 2.0:
-                    severity = 'major'
-                elif max_rate > 1.0:
-                    severity = 'moderate'
-                else:
-                    severity = 'minor'
-                
-                events.append(PrecursorEvent(
-                    precursor_type='rapid_rise',
-                    detected_at=event_start,
-                    value=max_rate,
-                    severity=severity,
-                    hours_before_peak=0,  # Updated by caller
-                    description=f"Rapid rise of {max_rate:.2f} ft/day for {duration:.1f} hours"
-                ))
-            in_event = False
+    window_hours = 6
+    
+    try:
+        from floml._precursors_numba import _hourly_interp, _scan_rapid
+    except ImportError:
+        _scan_rapid = None
+    
+    if _scan_rapid is not None and len(stage) and stage.dtype == np.float64:
+        # Binning, gap filling and the run scan all on raw arrays
+        first_bin = floor_timestamp(stage.index.min(), '1H')
+        stage_hourly = _hourly_interp(
+            np.require(stage.index.as_unit('ns').asi8, np.int64, 'CW'),
+            np.require(stage.to_numpy(), np.float64, 'CW'),
+            first_bin.value
+        )
+        starts, ends, max_rates = _scan_rapid(stage_hourly, window_hours, threshold_ft_per_day)
+        detected_at = first_bin + pd.to_timedelta(starts, unit='h')
+    else:
+        stage_hourly = resample_hourly(stage).interpolate()
+        if _scan_rapid is not None:
+            starts, ends, max_rates = _scan_rapid(
+                stage_hourly.to_numpy(dtype=np.float64), window_hours, threshold_ft_per_day
+            )
+        else:
+            starts, ends, max_rates = _find_rapid_runs(
+                stage_hourly, window_hours, threshold_ft_per_day
+            )
+        detected_at = stage_hourly.index[starts]
+    
+    # Hourly resampling means index distance is duration in hours
+    durations = ends - starts
+    
+    keep = durations >= min_duration_hours
+    starts, durations, max_rates = starts[keep], durations[keep], max_rates[keep]
+    
+    # Classify severity
+    severity = np.select([max_rates > 2.0, max_rates > 1.0], ['major', 'moderate'], 'minor')
+    
+    events = PrecursorEventArray.from_columns(
+        'rapid_rise',
+        detected_at=detected_at[keep],
+        value=max_rates,
+        severity=severity,
+        description=[
+            f"Rapid rise of {rate:.2f} ft/day for {float(duration):.1f} hours"
+            for rate, duration in zip(max_rates, durations)
+        ]
+    )
     
     logger.info(f"Detected {len(events)} rapid rise events")
     return events
@@ -119,7 +274,7 @@ def detect_sustained_rise(
     stage: pd.Series,
     threshold_ft: float = 2.0,
     window_days: int = 7
-) -> List[PrecursorEvent]:
+) -> PrecursorEventArray:
     """Detect sustained river rise over multiple days.
     
     Args:
@@ -128,18 +283,19 @@ def detect_sustained_rise(
         window_days: Window for measuring rise
         
     Returns:
-        List of detected sustained rise events
+        Detected sustained rise events
     """
-    events = []
-    
     # Daily resampling
-    stage_daily = stage.resample('1D').mean()
+    stage_daily = resample_daily(stage)
     
-    # Rolling min/max over window
-    rolling_min = stage_daily.rolling(window=window_days, min_periods=window_days).min()
-    rolling_max = stage_daily.rolling(window=window_days, min_periods=window_days).max()
+    # Rolling max - min over window (NaN until a full window of data)
+    vals = stage_daily.to_numpy(dtype=np.float64)
+    total_rise_vals = np.full(len(vals), np.nan)
+    if len(vals) >= window_days:
+        windows = sliding_window_view(vals, window_days)
+        total_rise_vals[window_days - 1:] = windows.max(axis=1) - windows.min(axis=1)
     
-    total_rise = rolling_max - rolling_min
+    total_rise = pd.Series(total_rise_vals, index=stage_daily.index, copy=False)
     
     # Detect where rise exceeds threshold
     sustained = total_rise > threshold_ft
@@ -147,52 +303,66 @@ def detect_sustained_rise(
     # Find start of sustained rise periods
     started = sustained & ~sustained.shift(1, fill_value=False)
     
-    for timestamp in started[started].index:
-        rise_value = total_rise[timestamp]
-        
-        # Classify severity
-        if rise_value > 6.0:
-            severity = 'major'
-        elif rise_value > 4.0:
-            severity = 'moderate'
-        else:
-            severity = 'minor'
-        
-        events.append(PrecursorEvent(
-            precursor_type='sustained_rise',
-            detected_at=timestamp,
-            value=rise_value,
-            severity=severity,
-            hours_before_peak=0,
-            description=f"Sustained rise of {rise_value:.2f} ft over {window_days} days"
-        ))
+    rise_values = total_rise[started].to_numpy(dtype=np.float64)
+    
+    # Classify severity
+    severity = np.select([rise_values > 6.0, rise_values > 4.0], ['major', 'moderate'], 'minor')
+    
+    events = PrecursorEventArray.from_columns(
+        'sustained_rise',
+        detected_at=started.index[started.to_numpy()],
+        value=rise_values,
+        severity=severity,
+        description=[
+            f"Sustained rise of {rise:.2f} ft over {window_days} days"
+            for rise in rise_values
+        ]
+    )
     
     logger.info(f"Detected {len(events)} sustained rise events")
     return events
 
 
 def analyze_precursors(
-    stage: pd.Series,
+    stage: Union[pd.Series, Tuple[np.ndarray, np.ndarray]],
     peak_time: pd.Timestamp,
     lookback_days: int = 14,
     rapid_rise_threshold: float = 0.5,
     sustained_rise_threshold: float = 2.0
-) -> List[PrecursorEvent]:
+) -> PrecursorEventArray:
     """Comprehensive precursor analysis for a flood event.
     
     Args:
-        stage: Time series of stage values
-        peak_time: Timestamp of flood peak
+        stage: Time series of stage values, or a (timestamps, values) pair
+            of arrays with sorted int64 epoch nanoseconds (UTC)
+        peak_time: Timestamp of flood peak (anything pd.Timestamp accepts)
         lookback_days: Days before peak to analyze
         rapid_rise_threshold: Threshold for rapid rise (ft/day)
         sustained_rise_threshold: Threshold for sustained rise (ft)
         
     Returns:
-        List of all detected precursor events with timing relative to peak
+        All detected precursor events with timing relative to peak
+        
+    Raises:
+        TypeError: If stage's index and peak_time disagree on tz-awareness
     """
+    peak_time = pd.Timestamp(peak_time)
+    
     # Extract window before peak
     window_start = peak_time - timedelta(days=lookback_days)
-    stage_window = stage[window_start:peak_time]
+    if isinstance(stage, tuple):
+        stage_window = _window_from_arrays(*stage, window_start, peak_time)
+    elif isinstance(stage.index, pd.DatetimeIndex) and stage.index.is_monotonic_increasing:
+        # Raw int64 comparison would silently treat naive times as UTC
+        if (stage.index.tz is None) != (peak_time.tz is None):
+            raise TypeError(
+                f"Cannot compare tz-naive and tz-aware times: stage index tz is "
+                f"{stage.index.tz}, peak_time tz is {peak_time.tz}"
+            )
+        lo, hi = _window_bounds(stage.index.as_unit('ns').asi8, window_start, peak_time)
+        stage_window = stage.iloc[lo:hi]
+    else:
+        stage_window = stage[window_start:peak_time]
     
     logger.info(f"Analyzing precursors from {window_start} to {peak_time}")
     
@@ -201,28 +371,65 @@ def analyze_precursors(
     sustained_events = detect_sustained_rise(stage_window, threshold_ft=sustained_rise_threshold)
     
     # Combine and update hours_before_peak
-    all_events = rapid_events + sustained_events
-    
-    for event in all_events:
-        event.hours_before_peak = (peak_time - event.detected_at).total_seconds() / 3600
+    all_events = PrecursorEventArray.concat([rapid_events, sustained_events])
+    all_events.hours_before_peak = (
+        (peak_time - all_events.detected_at).total_seconds().to_numpy() / 3600
+    )
     
     # Sort by detection time
-    all_events.sort(key=lambda e: e.detected_at)
+    all_events = all_events.take(np.argsort(all_events.detected_at.asi8, kind='stable'))
     
     logger.info(f"Found {len(all_events)} total precursor events")
     return all_events
 
 
-def compute_precursor_metrics(events: List[PrecursorEvent]) -> Dict[str, float]:
+def _window_bounds(
+    timestamps: np.ndarray,
+    start: pd.Timestamp,
+    end: pd.Timestamp
+) -> Tuple[int, int]:
+    """Positions [lo, hi) of sorted epoch-ns timestamps within [start, end].
+    
+    Binary search on the raw int64 values; same bounds as a label slice
+    stage[start:end] on a sorted index.
+    """
+    lo = np.searchsorted(timestamps, start.value, side='left')
+    hi = np.searchsorted(timestamps, end.value, side='right')
+    return int(lo), int(hi)
+
+
+def _window_from_arrays(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    start: pd.Timestamp,
+    end: pd.Timestamp
+) -> pd.Series:
+    """Series over [start, end] from sorted epoch-ns timestamps and values.
+    
+    The index is a view of the timestamp array; it is UTC when end is
+    tz-aware, naive otherwise.
+    """
+    lo, hi = _window_bounds(timestamps, start, end)
+    
+    index = pd.DatetimeIndex(timestamps[lo:hi].view('M8[ns]'))
+    if end.tz is not None:
+        index = index.tz_localize('UTC')
+    
+    return pd.Series(values[lo:hi], index=index, copy=False)
+
+
+def compute_precursor_metrics(
+    events: Union[PrecursorEventArray, List[PrecursorEvent]]
+) -> Dict[str, float]:
     """Compute summary metrics from precursor events.
     
     Args:
-        events: List of detected precursor events
+        events: Detected precursor events (array or list)
         
     Returns:
         Dictionary of metrics
     """
-    if not events:
+    if not len(events):
         return {
             'total_events': 0,
             'earliest_warning_hours': 0,
@@ -230,16 +437,19 @@ def compute_precursor_metrics(events: List[PrecursorEvent]) -> Dict[str, float]:
             'major_events': 0
         }
     
-    rapid_events = [e for e in events if e.precursor_type == 'rapid_rise']
-    major_events = [e for e in events if e.severity == 'major']
+    if not isinstance(events, PrecursorEventArray):
+        events = PrecursorEventArray.from_events(events)
+    
+    is_rapid = events.precursor_type == 'rapid_rise'
+    n_rapid = int(np.count_nonzero(is_rapid))
     
     return {
         'total_events': len(events),
-        'earliest_warning_hours': max(e.hours_before_peak for e in events),
-        'max_rise_rate': max((e.value for e in rapid_events), default=0),
-        'rapid_rise_events': len(rapid_events),
-        'sustained_rise_events': len([e for e in events if e.precursor_type == 'sustained_rise']),
-        'major_events': len(major_events)
+        'earliest_warning_hours': float(events.hours_before_peak.max()),
+        'max_rise_rate': float(events.value[is_rapid].max()) if n_rapid else 0,
+        'rapid_rise_events': n_rapid,
+        'sustained_rise_events': int(np.count_nonzero(events.precursor_type == 'sustained_rise')),
+        'major_events': int(np.count_nonzero(events.severity == 'major'))
     }
 
 
@@ -40,20 +40,12 @@ class RegressionResult:
         Returns:
             Predicted values
         """
-        x = np.asarray(x)
-        y_pred = np.zeros_like(x, dtype=float)
+        x = np.asarray(x, dtype=np.float64)
         
-        for i in range(self.n_segments):
-            if i == 0:
-                mask = x <= self.breakpoints[i + 1]
-            elif i == self.n_segments - 1:
-                mask = x > self.breakpoints[i]
-            else:
-                mask = (x > self.breakpoints[i]) & (x <= self.breakpoints[i + 1])
-            
-            y_pred[mask] = self.slopes[i] * x[mask] + self.intercepts[i]
+        # Segment i covers (b_i, b_{i+1}]; the outer segments extend to ±inf
+        idx = np.searchsorted(self.breakpoints[1:-1], x, side='left')
         
-        return y_pred
+        return self.slopes[idx] * x + self.intercepts[idx]
     
     def __str__(self) -> str:
         """Human-readable summary of regression."""
@@ -74,6 +66,9 @@ def fit_segmented_regression(
 ) -> RegressionResult:
     """Fit a segmented (piecewise) linear regression model.
     
+    With numba installed, 2- and 3-segment fits without breakpoint_init
+    locate breakpoints by brute-force search before refining with pwlf.
+    
     Args:
         x: Independent variable (e.g., discharge)
         y: Dependent variable (e.g., stage)
@@ -107,6 +102,49 @@ def fit_segmented_regression(
     x = x[mask]
     y = y[mask]
     
+    breakpoint_guess = None
+    if breakpoint_init is None and n_segments in (2, 3):
+        breakpoint_guess = _numba_breakpoint_guess(x, y, n_segments)
+    
+    return _fit_clean(
+        x, y, n_segments,
+        breakpoint_init=breakpoint_init,
+        breakpoint_guess=breakpoint_guess
+    )
+
+
+def _numba_breakpoint_guess(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_segments: int
+) -> Optional[np.ndarray]:
+    """Grid-search breakpoints with the numba kernels, if available.
+    
+    The result seeds pwlf's local search in place of its global
+    differential-evolution search. Returns None when numba is not
+    installed or the grid search has no usable candidates.
+    """
+    try:
+        from floml._pwlf_numba import _brute_breakpoints
+    except ImportError:
+        return None
+    
+    return _brute_breakpoints(x, y, n_segments)
+
+
+def _fit_clean(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_segments: int,
+    breakpoint_init: Optional[np.ndarray] = None,
+    breakpoint_guess: Optional[np.ndarray] = None
+) -> RegressionResult:
+    """Fit pwlf model to x/y already validated and stripped of NaN.
+    
+    breakpoint_init fixes the breakpoints (endpoints included), while
+    breakpoint_guess seeds a local search from interior breakpoints
+    instead of running the global differential-evolution search.
+    """
     logger.info(f"Fitting {n_segments}-segment regression to {len(x)} data points")
     
     # Create piecewise linear fit object
@@ -115,6 +153,8 @@ def fit_segmented_regression(
     # Fit the model
     if breakpoint_init is not None:
         model.fit_with_breaks(breakpoint_init)
+    elif breakpoint_guess is not None:
+        model.fit_guess(breakpoint_guess)
     else:
         # Automatically determine breakpoints
         model.fit(n_segments)
@@ -126,10 +166,7 @@ def fit_segmented_regression(
     
     # Calculate R² and RMSE
     y_pred = model.predict(x)
-    ss_res = np.sum((y - y_pred) ** 2)
-    ss_tot = np.sum((y - np.mean(y)) ** 2)
-    r_squared = 1 - (ss_res / ss_tot)
-    rmse = np.sqrt(np.mean((y - y_pred) ** 2))
+    r_squared, rmse = _goodness_of_fit(y, y_pred)
     
     logger.info(f"Fit complete: R² = {r_squared:.4f}, RMSE = {rmse:.4f}")
     
@@ -143,6 +180,31 @@ def fit_segmented_regression(
     )
 
 
+def _fit_linear(x: np.ndarray, y: np.ndarray) -> RegressionResult:
+    """Closed-form single-segment fit (ordinary least squares)."""
+    slope, intercept = np.polyfit(x, y, 1)
+    y_pred = slope * x + intercept
+    r_squared, rmse = _goodness_of_fit(y, y_pred)
+    
+    return RegressionResult(
+        breakpoints=np.array([x.min(), x.max()]),
+        slopes=np.array([slope]),
+        intercepts=np.array([intercept]),
+        r_squared=r_squared,
+        rmse=rmse,
+        n_segments=1
+    )
+
+
+def _goodness_of_fit(y: np.ndarray, y_pred: np.ndarray) -> Tuple[float, float]:
+    """R² and RMSE of predictions against observed values."""
+    ss_res = np.sum((y - y_pred) ** 2)
+    ss_tot = np.sum((y - np.mean(y)) ** 2)
+    r_squared = 1 - (ss_res / ss_tot)
+    rmse = np.sqrt(np.mean((y - y_pred) ** 2))
+    return r_squared, rmse
+
+
 def fit_stage_discharge(
     discharge_cfs: pd.Series,
     stage_ft: pd.Series,
@@ -194,10 +256,35 @@ def find_optimal_segments(
     if pwlf is None:
         raise ImportError("pwlf package required")
     
+    x = np.asarray(x, dtype=float).flatten()
+    y = np.asarray(y, dtype=float).flatten()
+    
+    if len(x) != len(y):
+        raise ValueError(f"x and y must have same length (got {len(x)} and {len(y)})")
+    
+    # Clean once for the whole sweep
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x = x[mask]
+    y = y[mask]
+    
     r_squared_values = []
+    result = None
     
     for n in range(1, max_segments + 1):
-        result = fit_segmented_regression(x, y, n_segments=n)
+        if n == 1:
+            result = _fit_linear(x, y)
+        else:
+            # Warm-start from the previous fit plus a breakpoint at the
+            # worst-fit point, rather than a fresh global search
+            residuals = y - result.predict(x)
+            x_new = x[np.argmax(np.abs(residuals))]
+            interior = result.breakpoints[1:-1]
+            
+            if x_new <= x.min() or x_new >= x.max() or np.isin(x_new, interior):
+                result = _fit_clean(x, y, n)
+            else:
+                result = _fit_clean(x, y, n, breakpoint_guess=np.sort(np.r_[interior, x_new]))
+        
         r_squared_values.append(result.r_squared)
         logger.info(f"  {n} segments: R² = {result.r_squared:.4f}")
     
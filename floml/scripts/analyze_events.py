@@ -9,12 +9,20 @@ Demonstrates using FloML to analyze historical flood events:
 5. Store results back to database
 """
 
+import os
 import sys
+import json
+import time
+import hashlib
+import importlib.util
 import logging
 import argparse
 from datetime import timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
+from psycopg2.extras import execute_values
 
 from floml.db import get_engine, verify_schemas
 from floml.precursors import analyze_precursors, compute_precursor_metrics
@@ -27,131 +35,346 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Stage reads go straight into numpy arrays, so Arrow-backed columns are
+# safe there and skip pandas' object-array inference
+_STAGE_DTYPE_BACKEND = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'numpy'
 
-def load_flood_events(engine, site_code=None):
-    """Load historical flood events from database."""
+_BANNER = '=' * 60
+_NS_PER_HOUR = 3_600_000_000_000
+_MAX_LISTED_PRECURSORS = 20
+_MIN_REGRESSION_PAIRS = 50
+_EVENT_CACHE_DIR = Path.home() / '.cache' / 'floml'
+_EVENT_CACHE_TTL = 3600  # seconds
+
+
+def load_flood_events(engine, site_code=None, use_cache=False):
+    """Load historical flood events from database.
+    
+    With use_cache, results are kept as parquet under ~/.cache/floml for
+    _EVENT_CACHE_TTL seconds, keyed by query and site code, so repeat runs
+    skip the database. Cache problems (e.g. pyarrow missing) fall back to
+    the query.
+    """
     query = """
         SELECT e.id, e.site_code, e.crest_time, e.peak_stage_ft, 
                e.severity, t.flood_stage_ft
         FROM nws.flood_events e
         JOIN nws.flood_thresholds t ON e.site_code = t.site_code
         WHERE e.crest_time IS NOT NULL
+          AND (%(site_code)s IS NULL OR e.site_code = %(site_code)s)
+        ORDER BY e.crest_time DESC
+        LIMIT 10
     """
     
-    if site_code:
-        query += f" AND e.site_code = '{site_code}'"
+    key = hashlib.sha1(f"{query}\0{site_code or ''}".encode()).hexdigest()[:12]
+    cache_path = _EVENT_CACHE_DIR / f"events_{key}.parquet"
+    
+    if use_cache:
+        try:
+            if time.time() - cache_path.stat().st_mtime < _EVENT_CACHE_TTL:
+                events = pd.read_parquet(cache_path)
+                logger.info("Loaded %d flood events from %s", len(events), cache_path)
+                return events
+        except FileNotFoundError:
+            pass
+        except (ImportError, OSError, ValueError) as e:
+            logger.warning("Ignoring event cache: %s", e)
+    
+    # One statement whether or not a site filter is given
+    events = pd.read_sql(query, engine, params={'site_code': site_code or None})
+    logger.info("Loaded %d flood events", len(events))
     
-    query += " ORDER BY e.crest_time DESC LIMIT 10"
+    if use_cache:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            events.to_parquet(cache_path)
+        except (ImportError, OSError, ValueError) as e:
+            logger.warning("Could not write event cache: %s", e)
     
-    events = pd.read_sql(query, engine)
-    logger.info(f"Loaded {len(events)} flood events")
     return events
 
 
 def load_stage_data(engine, site_code, start_time, end_time):
-    """Load stage data for a site and time window."""
+    """Load stage data for a site and time window.
+    
+    Returns:
+        Tuple of (timestamps, values): sorted int64 epoch nanoseconds (UTC)
+        and float64 stage in ft, both read-only
+    """
+    # Epoch microseconds are UTC whatever the session TimeZone, so rows
+    # never carry per-row (DST-dependent) offsets into pandas
     query = """
-        SELECT reading_time as timestamp, value as stage_ft
+        SELECT (extract(epoch FROM reading_time) * 1000000)::bigint * 1000 as timestamp_ns,
+               value::double precision as stage_ft
         FROM usgs_raw.gauge_readings
         WHERE site_code = %(site_code)s
           AND parameter_code = '00065'
           AND reading_time BETWEEN %(start)s AND %(end)s
-        ORDER BY reading_time
     """
     
     data = pd.read_sql(
         query, 
         engine,
-        params={'site_code': site_code, 'start': start_time, 'end': end_time}
+        params={'site_code': site_code, 'start': start_time, 'end': end_time},
+        dtype_backend=_STAGE_DTYPE_BACKEND
     )
     
     if len(data) > 0:
-        data.set_index('timestamp', inplace=True)
-        logger.info(f"Loaded {len(data)} stage readings for {site_code}")
+        logger.info("Loaded %d stage readings for %s", len(data), site_code)
     else:
-        logger.warning(f"No stage data found for {site_code}")
+        logger.warning("No stage data found for %s", site_code)
     
-    return data
+    return _stage_arrays(data)
 
 
-def analyze_event(engine, event_row):
-    """Analyze a single flood event."""
-    site_code = event_row['site_code']
-    crest_time = pd.Timestamp(event_row['crest_time'])
-    event_id = event_row['id']
+def _stage_arrays(data, group=None):
+    """Read-only (epoch ns, float64) arrays from timestamp_ns/stage_ft columns.
     
-    logger.info(f"\n{'='*60}")
-    logger.info(f"Analyzing Event {event_id}: {site_code} at {crest_time}")
-    logger.info(f"Peak: {event_row['peak_stage_ft']:.2f} ft ({event_row['severity']})")
-    logger.info(f"{'='*60}\n")
+    The queries leave ordering to the client: rows are sorted by time, or
+    by group then time when a group array (e.g. event ids) is given.
+    """
+    timestamps = data['timestamp_ns'].to_numpy(dtype=np.int64)
+    if group is None:
+        # Timsort; linear when the rows already arrived in index order
+        order = np.argsort(timestamps, kind='stable')
+    else:
+        order = np.lexsort((timestamps, group))
+    
+    timestamps = timestamps[order]
+    values = data['stage_ft'].to_numpy(dtype=np.float64)[order]
+    timestamps.setflags(write=False)
+    values.setflags(write=False)
+    return timestamps, values
+
+
+def load_event_stage_data(engine, events, lookback_days=14):
+    """Load stage data for every event's precursor window in one query.
+    
+    Events sharing a site and window (e.g. duplicate crest records) are
+    fetched once and share the same read-only arrays.
+    
+    Returns a dict mapping event id to a (timestamps, values) pair as from
+    load_stage_data, so per-event analysis doesn't pay a database
+    round-trip each.
+    """
+    crest_times = pd.to_datetime(events['crest_time'])
+    event_windows = pd.DataFrame({
+        'site_code': events['site_code'],
+        'window_start': crest_times - timedelta(days=lookback_days),
+        'window_end': crest_times + timedelta(days=1),
+    })
+    window_of_event = event_windows.groupby(list(event_windows.columns), sort=False).ngroup()
+    unique_windows = event_windows.drop_duplicates()
+    
+    windows = {
+        'window_ids': list(range(len(unique_windows))),
+        'site_codes': list(unique_windows['site_code']),
+        'starts': [t.to_pydatetime() for t in unique_windows['window_start']],
+        'ends': [t.to_pydatetime() for t in unique_windows['window_end']],
+    }
+    
+    # Timestamps as UTC epoch integers, as in load_stage_data
+    query = """
+        WITH windows AS (
+            SELECT *
+            FROM unnest(%(window_ids)s::int[], %(site_codes)s::text[],
+                        %(starts)s::timestamptz[], %(ends)s::timestamptz[])
+                 AS w(window_id, site_code, window_start, window_end)
+        )
+        SELECT w.window_id,
+               (extract(epoch FROM r.reading_time) * 1000000)::bigint * 1000 as timestamp_ns,
+               r.value::double precision as stage_ft
+        FROM windows w
+        JOIN usgs_raw.gauge_readings r
+          ON r.site_code = w.site_code
+         AND r.parameter_code = '00065'
+         AND r.reading_time BETWEEN w.window_start AND w.window_end
+    """
+    
+    data = pd.read_sql(query, engine, params=windows, dtype_backend=_STAGE_DTYPE_BACKEND)
+    logger.info("Loaded %d stage readings for %d events (%d distinct windows)",
+                len(data), len(events), len(unique_windows))
+    
+    # Sorted by window then time, so each window is a contiguous slice
+    window_ids = data['window_id'].to_numpy()
+    timestamps, values = _stage_arrays(data, group=window_ids)
+    window_ids, counts = np.unique(window_ids, return_counts=True)
+    bounds = np.r_[0, np.cumsum(counts)]
+    by_window = {
+        int(window_id): (timestamps[lo:hi], values[lo:hi])
+        for window_id, lo, hi in zip(window_ids, bounds[:-1], bounds[1:])
+    }
+    
+    return {
+        int(event_id): by_window[window_id]
+        for event_id, window_id in zip(events['id'], window_of_event)
+        if window_id in by_window
+    }
+
+
+def downsample_hourly_max(timestamps, values):
+    """Reduce (timestamps, values) arrays to one maximum per clock hour.
+    
+    Hours without readings are left out; timestamps must be sorted.
+    """
+    hours = timestamps // _NS_PER_HOUR
+    starts = np.flatnonzero(np.r_[True, hours[1:] != hours[:-1]])
+    return hours[starts] * _NS_PER_HOUR, np.fmax.reduceat(values, starts)
+
+
+def analyze_event(engine, event, stage_data=None, max_points=1000):
+    """Analyze a single flood event.
+    
+    event is a row from load_flood_events as a namedtuple (itertuples);
+    stage_data is the event's preloaded window (see load_event_stage_data);
+    when omitted it is fetched from the database. Windows with more than
+    max_points readings are reduced to hourly maxima first (None keeps
+    full resolution). Nothing is printed here, so events can be analyzed
+    on worker threads; see report_event.
+    
+    Returns:
+        Result dict, or None when there is no stage data for the window
+    """
+    site_code = event.site_code
+    crest_time = event.crest_time
     
     # Load stage data for precursor window (14 days before peak)
     lookback_days = 14
     window_start = crest_time - timedelta(days=lookback_days)
     window_end = crest_time + timedelta(days=1)
     
-    stage_data = load_stage_data(engine, site_code, window_start, window_end)
+    if stage_data is None:
+        stage_data = load_stage_data(engine, site_code, window_start, window_end)
     
-    if stage_data.empty:
-        logger.warning("No data available for analysis")
+    if len(stage_data[0]) == 0:
         return None
     
-    # Analyze precursors
-    logger.info("🔍 Detecting precursor patterns...")
+    # Dense gauges (5-15 min) carry far more points than hourly detection needs
+    if max_points is not None and len(stage_data[0]) > max_points:
+        stage_data = downsample_hourly_max(*stage_data)
+    
     precursors = analyze_precursors(
-        stage_data['stage_ft'],
+        stage_data,
         peak_time=crest_time,
         lookback_days=lookback_days
     )
     
+    return {
+        'event_id': event.id,
+        'site_code': site_code,
+        'precursor_count': len(precursors),
+        'metrics': compute_precursor_metrics(precursors) if precursors else {},
+        'precursors': precursors
+    }
+
+
+def report_event(event, result):
+    """Print the analysis of one event (result from analyze_event)."""
+    logger.info("\n%s", _BANNER)
+    logger.info("Analyzing Event %s: %s at %s", event.id, event.site_code, event.crest_time)
+    logger.info("Peak: %.2f ft (%s)", event.peak_stage_ft, event.severity)
+    logger.info("%s\n", _BANNER)
+    
+    if result is None:
+        logger.warning("No data available for analysis")
+        return
+    
+    precursors = result['precursors']
+    metrics = result['metrics']
+    
     if precursors:
         print(f"\n📋 Found {len(precursors)} precursor events:")
-        for p in precursors:
-            print(f"  • {p.precursor_type:15s} {p.hours_before_peak:6.1f}h before peak - {p.description}")
+        # Read the columns directly rather than materializing a PrecursorEvent
+        # per row; long listings are cut off and written in one call
+        n = _MAX_LISTED_PRECURSORS
+        lines = [
+            f"  • {ptype:15s} {hours:6.1f}h before peak - {desc}"
+            for ptype, hours, desc in zip(
+                precursors.precursor_type[:n], precursors.hours_before_peak[:n],
+                precursors.description[:n]
+            )
+        ]
+        if len(precursors) > n:
+            lines.append(f"  ... {len(precursors) - n} more")
+        sys.stdout.write('\n'.join(lines) + '\n')
         
-        metrics = compute_precursor_metrics(precursors)
         print(f"\n📊 Precursor Metrics:")
         print(f"  Earliest warning: {metrics['earliest_warning_hours']:.1f} hours")
         print(f"  Max rise rate: {metrics['max_rise_rate']:.2f} ft/day")
         print(f"  Major events: {metrics['major_events']}")
     else:
         print("  No significant precursors detected")
-    
-    return {
-        'event_id': event_id,
-        'site_code': site_code,
-        'precursor_count': len(precursors),
-        'metrics': compute_precursor_metrics(precursors) if precursors else {}
-    }
 
 
-def analyze_stage_discharge(engine, site_code):
-    """Analyze stage-discharge relationship for a station."""
-    logger.info(f"\n{'='*60}")
-    logger.info(f"Stage-Discharge Analysis: {site_code}")
-    logger.info(f"{'='*60}\n")
+def analyze_stage_discharge(engine, site_codes):
+    """Analyze stage-discharge relationships for one or more stations.
+    
+    All sites' paired readings come back in a single query and are fitted
+    site by site.
+    
+    Returns:
+        Dict mapping site code to RegressionResult (None where the fit was
+        skipped or failed)
+    """
+    if isinstance(site_codes, str):
+        site_codes = [site_codes]
     
     # Load paired stage and discharge data
+    # Each CTE is a range scan on (site_code, parameter_code, reading_time)
     query = """
-        SELECT reading_time,
-               MAX(CASE WHEN parameter_code = '00065' THEN value END) as stage_ft,
-               MAX(CASE WHEN parameter_code = '00060' THEN value END) as discharge_cfs
-        FROM usgs_raw.gauge_readings
-        WHERE site_code = %(site_code)s
-          AND reading_time > NOW() - INTERVAL '1 year'
-        GROUP BY reading_time
-        HAVING MAX(CASE WHEN parameter_code = '00065' THEN value END) IS NOT NULL
-           AND MAX(CASE WHEN parameter_code = '00060' THEN value END) IS NOT NULL
-        ORDER BY reading_time
+        WITH s AS (
+            SELECT site_code, reading_time, value as stage_ft
+            FROM usgs_raw.gauge_readings
+            WHERE site_code = ANY(%(sites)s)
+              AND parameter_code = '00065'
+              AND reading_time > NOW() - INTERVAL '1 year'
+        ),
+        d AS (
+            SELECT site_code, reading_time, value as discharge_cfs
+            FROM usgs_raw.gauge_readings
+            WHERE site_code = ANY(%(sites)s)
+              AND parameter_code = '00060'
+              AND reading_time > NOW() - INTERVAL '1 year'
+        )
+        SELECT site_code, reading_time, stage_ft, discharge_cfs
+        FROM (
+            SELECT s.site_code, s.reading_time, s.stage_ft, d.discharge_cfs,
+                   count(*) OVER (PARTITION BY s.site_code) as n_pairs
+            FROM s
+            JOIN d USING (site_code, reading_time)
+        ) paired
+        WHERE n_pairs >= %(min_pairs)s
+        ORDER BY site_code, reading_time
     """
     
-    data = pd.read_sql(query, engine, params={'site_code': site_code})
+    # Server-side cursor: rows arrive 50k at a time instead of the driver
+    # buffering the whole year client-side before pandas sees any of it.
+    # Sites too sparse to fit are filtered out on the server
+    params = {'sites': list(site_codes), 'min_pairs': _MIN_REGRESSION_PAIRS}
+    with engine.connect().execution_options(stream_results=True) as conn:
+        chunks = pd.read_sql(query, conn, params=params, chunksize=50_000)
+        data = pd.concat(chunks, ignore_index=True)
+    
+    by_site = dict(tuple(data.groupby('site_code', sort=False)))
     
-    if len(data) < 50:
-        logger.warning(f"Insufficient data for regression (only {len(data)} points)")
+    return {
+        site_code: _fit_stage_discharge_site(site_code, by_site.get(site_code, data.iloc[:0]))
+        for site_code in site_codes
+    }
+
+
+def _fit_stage_discharge_site(site_code, data):
+    """Fit and print the stage-discharge regression for one station."""
+    logger.info("\n%s", _BANNER)
+    logger.info("Stage-Discharge Analysis: %s", site_code)
+    logger.info("%s\n", _BANNER)
+    
+    if len(data) < _MIN_REGRESSION_PAIRS:
+        logger.warning("Insufficient data for regression (fewer than %d paired points)",
+                       _MIN_REGRESSION_PAIRS)
         return None
     
-    logger.info(f"Loaded {len(data)} paired observations")
+    logger.info("Loaded %d paired observations", len(data))
     
     # Fit segmented regression
     try:
@@ -169,25 +392,93 @@ def analyze_stage_discharge(engine, site_code):
         
         return result
     except Exception as e:
-        logger.error(f"Regression failed: {e}")
+        logger.error("Regression failed: %s", e)
         return None
 
 
+def store_precursors(engine, results):
+    """Write detected precursors to flood_analysis.event_precursors.
+    
+    Rows are sent in pages with execute_values and committed in one
+    transaction. Events are matched to flood_analysis.events through
+    source_event_id; precursors of events without an analysis record are
+    skipped, and rows already stored are left alone.
+    
+    Returns:
+        Number of rows inserted
+    """
+    rows = []
+    for r in results:
+        p = r['precursors']
+        value_key = np.where(p.precursor_type == 'rapid_rise', 'rise_rate_ft_per_day', 'total_rise_ft')
+        rows.extend(
+            (int(r['event_id']), ptype, detected_at, desc, int(round(hours)),
+             json.dumps({key: round(float(value), 4), 'severity': severity}))
+            for ptype, detected_at, desc, hours, key, value, severity in zip(
+                p.precursor_type, p.detected_at.to_pydatetime(), p.description,
+                p.hours_before_peak, value_key, p.value, p.severity
+            )
+        )
+    
+    if not rows:
+        return 0
+    
+    query = """
+        INSERT INTO flood_analysis.event_precursors
+            (event_id, precursor_type, detected_at, description, hours_before_peak, metrics)
+        SELECT e.id, v.precursor_type, v.detected_at, v.description, v.hours_before_peak, v.metrics
+        FROM (VALUES %s) AS v(source_event_id, precursor_type, detected_at,
+                              description, hours_before_peak, metrics)
+        JOIN flood_analysis.events e ON e.source_event_id = v.source_event_id
+        ON CONFLICT (event_id, precursor_type, detected_at) DO NOTHING
+        RETURNING 1
+    """
+    
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            inserted = execute_values(
+                cur, query, rows,
+                template="(%s, %s, %s::timestamptz, %s, %s, %s::jsonb)",
+                page_size=500, fetch=True
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    logger.info("Stored %d of %d precursor rows", len(inserted), len(rows))
+    return len(inserted)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Analyze flood events')
     parser.add_argument('--site-code', help='Analyze specific site only')
     parser.add_argument('--regression', action='store_true', help='Include stage-discharge regression')
+    parser.add_argument('--verify-schemas', action='store_true',
+                        help='Check required schemas exist before analyzing (or set FLOML_VERIFY_SCHEMAS=1)')
+    parser.add_argument('--cache', action=argparse.BooleanOptionalAction, default=False,
+                        help='Reuse flood events loaded within the last hour (parquet, needs pyarrow)')
+    parser.add_argument('--store', action='store_true',
+                        help='Save detected precursors to flood_analysis.event_precursors')
+    parser.add_argument('--downsample-above', type=int, default=1000, metavar='N',
+                        help='Use hourly maxima for event windows with more than N readings (0 disables)')
     args = parser.parse_args()
     
     try:
         # Connect to database
         logger.info("Connecting to database...")
         engine = get_engine()
-        verify_schemas(engine)
+        if args.verify_schemas or os.environ.get('FLOML_VERIFY_SCHEMAS') == '1':
+            verify_schemas(engine)
+        else:
+            logger.debug("Skipping schema verification")
         print("✓ Database connected\n")
         
         # Load flood events
-        events = load_flood_events(engine, args.site_code)
+        events = load_flood_events(engine, args.site_code, use_cache=args.cache)
         
         if events.empty:
             print("No flood events found in database")
@@ -195,29 +486,48 @@ def main():
         
         print(f"Found {len(events)} flood events to analyze\n")
         
-        # Analyze each event
+        # Load all precursor windows up front, then analyze events in
+        # parallel; reports are printed in event order as results arrive
+        stage_by_event = load_event_stage_data(engine, events)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0))
+        rows = list(events.itertuples(index=False))
+        
         results = []
-        for idx, event in events.iterrows():
-            result = analyze_event(engine, event)
-            if result:
-                results.append(result)
+        total_precursors = 0
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            analyses = executor.map(
+                lambda event: analyze_event(
+                    engine, event, stage_by_event.get(event.id, empty),
+                    max_points=args.downsample_above or None
+                ),
+                rows
+            )
+            for event, result in zip(rows, analyses):
+                report_event(event, result)
+                if result:
+                    results.append(result)
+                    total_precursors += result['precursor_count']
+        
+        if args.store:
+            store_precursors(engine, results)
         
-        # Optional: stage-discharge regression
-        if args.regression and args.site_code:
-            analyze_stage_discharge(engine, args.site_code)
+        # Optional: stage-discharge regression, one query for all sites
+        if args.regression:
+            sites = [args.site_code] if args.site_code else list(events['site_code'].unique())
+            analyze_stage_discharge(engine, sites)
         
         # Summary
-        print(f"\n{'='*60}")
-        print(f"Analysis Complete")
-        print(f"{'='*60}")
+        print(f"\n{_BANNER}")
+        print("Analysis Complete")
+        print(_BANNER)
         print(f"Events analyzed: {len(results)}")
         
         if results:
-            avg_precursors = np.mean([r['precursor_count'] for r in results])
+            avg_precursors = total_precursors / len(results)
             print(f"Average precursors per event: {avg_precursors:.1f}")
         
     except Exception as e:
-        logger.error(f"Analysis failed: {e}", exc_info=True)
+        logger.error("Analysis failed: %s", e, exc_info=True)
         return 1
     
     return 0